@@ -1,87 +1,117 @@
 #!/usr/bin/env python3
+import contextlib
+import fnmatch
+import functools
+import importlib.util
+import itertools
 import json
 import os
+import re
+import shutil
+import stat
+import string
+import subprocess
 import sys
-import threading
-from typing import List, Dict, Any, Tuple, Optional
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Tuple, Optional
 
 import click
 import pyperclip
 import yaml
 from tqdm import tqdm
 
-# Import the transform functionality from extract-code-signatures.py
-# Import handling that works with hyphenated filenames and is path independent
+# The transform functionality lives in extract-code-signatures.py next to this script.
+# It is imported by path because of the hyphenated filename, and only once a transform
+# or the system prompt is actually needed.
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
-# Direct import with importlib for extract-code-signatures.py
-import importlib.util
 
-extract_file_path = os.path.join(script_dir, "extract-code-signatures.py")
-if not os.path.exists(extract_file_path):
-    # Try in same directory without script_dir prefix
-    extract_file_path = "extract-code-signatures.py"
+@functools.lru_cache(maxsize=1)
+def load_extract_code_signatures():
+    """
+    Load the extract-code-signatures.py module on first use.
+
+    The module is registered in sys.modules, so worker processes forked after
+    it has been loaded reuse it instead of parsing the file again.
+
+    Returns:
+        The extract_code_signatures module, or None if it could not be loaded.
+    """
+    module = sys.modules.get("extract_code_signatures")
+    if module is not None:
+        return module
+
+    extract_file_path = os.path.join(script_dir, "extract-code-signatures.py")
+    if not os.path.exists(extract_file_path):
+        # Try in same directory without script_dir prefix
+        extract_file_path = "extract-code-signatures.py"
+
+    if not os.path.exists(extract_file_path):
+        print(f"Warning: extract-code-signatures.py not found at {extract_file_path}.", file=sys.stderr)
+        return None
 
-if os.path.exists(extract_file_path):
     spec = importlib.util.spec_from_file_location("extract_code_signatures", extract_file_path)
-    if spec and spec.loader:
-        extract_code_signatures = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(extract_code_signatures)
-        transform_content = extract_code_signatures.transform_content
-        SYSTEM_PROMPT = extract_code_signatures.SYSTEM_PROMPT
-    else:
-        def transform_content(content, transform_type):
-            print(f"Warning: Could not load module from {extract_file_path}. Cannot transform to {transform_type}.",
-                  file=sys.stderr)
-            return content
-
-
-        SYSTEM_PROMPT = """You are an expert Python programmer analyzing code files that include both
-IDL (Interface Definition Language) declarations and Python implementations.
-In these concatenated files, IDL declarations serve as interfaces or traits with type information,
- while the Python code contains the actual implementations.
-
-When analyzing, use the IDL declarations as a guide to understand the intended design,
-but focus primarily on the Python code. Your analysis should cover the overall purpose, module architecture,
-key functions, and notable design decisions.
-Emphasize practical insights that help developers understand and work with the code.
-
-Key Points:
-
-- Treat IDL declarations (with keywords like "function", "in", "returns", and "const") as Python interfaces 
-  with type hints.
-- Focus on the actual Python implementations for detailed analysis.
-- Provide an analysis that is structured yet adaptable to various files and user-specific prompts.
-"""
-else:
-    def transform_content(content, transform_type):
-        print(
-            f"Warning: extract-code-signatures.py not found at {extract_file_path}. Cannot transform to {transform_type}.",
-            file=sys.stderr)
-        return content
+    if not spec or not spec.loader:
+        print(f"Warning: Could not load module from {extract_file_path}.", file=sys.stderr)
+        return None
 
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["extract_code_signatures"] = module
+    spec.loader.exec_module(module)
+    return module
 
-    SYSTEM_PROMPT = """You are an expert Python programmer analyzing code files that include both
-IDL (Interface Definition Language) declarations and Python implementations.
-In these concatenated files, IDL declarations serve as interfaces or traits with type information,
- while the Python code contains the actual implementations.
 
-When analyzing, use the IDL declarations as a guide to understand the intended design,
-but focus primarily on the Python code. Your analysis should cover the overall purpose, module architecture,
-key functions, and notable design decisions.
-Emphasize practical insights that help developers understand and work with the code.
+def transform_content(content: str, transform_type: str) -> str:
+    """
+    Transform the content using extract-code-signatures.py.
 
-Key Points:
+    Args:
+        content (str): The content to transform.
+        transform_type (str): The type of transformation to apply.
+
+    Returns:
+        str: The transformed content, or the original content if the module is unavailable.
+    """
+    module = load_extract_code_signatures()
+    if module is None:
+        print(f"Warning: Cannot transform to {transform_type}.", file=sys.stderr)
+        return content
+    return module.transform_content(content, transform_type)
+
+
+def get_system_prompt() -> Optional[str]:
+    """
+    Get the system prompt to include with transformed content.
+
+    Returns:
+        Optional[str]: The system prompt from extract-code-signatures.py, or None if the module is unavailable.
+    """
+    module = load_extract_code_signatures()
+    if module is None:
+        print("Warning: Cannot include the system prompt.", file=sys.stderr)
+        return None
+    return module.SYSTEM_PROMPT
 
-- Treat IDL declarations (with keywords like "function", "in", "returns", and "const") as Python interfaces 
-  with type hints.
-- Focus on the actual Python implementations for detailed analysis.
-- Provide an analysis that is structured yet adaptable to various files and user-specific prompts.
-"""
 
 # Default file extension to use when none is specified
 default_extension = ".py"
 
+# Fewest transformed files worth starting worker processes for; fewer are transformed on threads
+MIN_FILES_FOR_PROCESSES = 16
+
+# Characters that make an exclude pattern a glob rather than a plain name
+GLOB_CHARS = re.compile(r"[*?[]")
+
+# Number of characters written to the clipboard command per chunk
+CLIPBOARD_CHUNK_SIZE = 1 << 20
+
+# Files larger than this many bytes get a hint to the kernel to read them ahead
+READAHEAD_THRESHOLD = 64 * 1024
+
+# Safe YAML loader, using the libyaml C implementation when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def load_config_profile(profile_path: Optional[str] = None) -> Dict[str, Any]:
     """
@@ -130,7 +160,7 @@ def load_config_profile(profile_path: Optional[str] = None) -> Dict[str, Any]:
                 with open(path, 'r', encoding='utf-8') as f:
                     # Determine file format based on extension
                     if path.endswith(('.yml', '.yaml')):
-                        config = yaml.safe_load(f)
+                        config = yaml.load(f, Loader=YAML_LOADER)
                     else:
                         config = json.load(f)
 
@@ -154,23 +184,67 @@ def load_config_profile(profile_path: Optional[str] = None) -> Dict[str, Any]:
     return {}
 
 
-def copy_to_clipboard(text: str) -> bool:
+def native_clipboard_command() -> Optional[List[str]]:
+    """
+    Find a clipboard command that reads the text to copy from stdin.
+
+    Returns:
+        Optional[List[str]]: The command line, or None if no supported command is available.
+    """
+    if sys.platform == "darwin":
+        candidates = [["pbcopy"]]
+    elif sys.platform.startswith("linux"):
+        candidates = [["xclip", "-selection", "clipboard"], ["xsel", "--clipboard", "--input"]]
+    else:
+        candidates = []
+
+    for command in candidates:
+        if shutil.which(command[0]):
+            return command
+    return None
+
+
+def copy_to_clipboard(pieces: Iterable[str]) -> bool:
     """
-    Copy the provided text to the clipboard.
+    Copy the concatenation of the provided pieces of text to the clipboard.
+
+    On macOS and Linux each piece is piped to pbcopy, xclip or xsel as soon as it
+    is produced, in chunks of at most CLIPBOARD_CHUNK_SIZE characters, so the whole
+    text is never built. Other platforms, or systems without these commands, join
+    the pieces and use pyperclip.
 
     Args:
-        text (str): The text to copy.
+        pieces (Iterable[str]): The pieces of text to copy.
 
     Returns:
         bool: True if successful, False otherwise.
     """
+    command = native_clipboard_command()
+    if command is None:
+        try:
+            pyperclip.copy("".join(pieces))
+            return True
+        except pyperclip.PyperclipException as e:
+            click.echo(f"Error copying to clipboard: {e}", err=True)
+            return False
+
+    # pbcopy only reads UTF-8 when the locale says so
+    env = dict(os.environ, LANG="en_US.UTF-8") if command[0] == "pbcopy" else None
     try:
-        pyperclip.copy(text)
-        return True
-    except pyperclip.PyperclipException as e:
+        with subprocess.Popen(command, stdin=subprocess.PIPE, env=env, close_fds=True) as process:
+            for piece in pieces:
+                for start in range(0, len(piece), CLIPBOARD_CHUNK_SIZE):
+                    process.stdin.write(piece[start:start + CLIPBOARD_CHUNK_SIZE].encode("utf-8"))
+            process.stdin.close()
+    except (OSError, UnicodeEncodeError) as e:
         click.echo(f"Error copying to clipboard: {e}", err=True)
         return False
 
+    if process.returncode != 0:
+        click.echo(f"Error copying to clipboard: {command[0]} exited with status {process.returncode}", err=True)
+        return False
+    return True
+
 
 def normalize_extensions(extensions: List[str]) -> List[str]:
     """
@@ -185,60 +259,222 @@ def normalize_extensions(extensions: List[str]) -> List[str]:
     return ["." + ext.lower().lstrip(".") for ext in extensions]
 
 
-def is_text_file(file_path: str) -> bool:
+def compile_name_patterns(patterns: List[str]) -> Callable[[str], bool]:
     """
-    Check if a file is a text file by looking for null bytes.
+    Build a function that tells whether a file or directory name matches any of the patterns.
+
+    Every pattern is first looked up as an exact name in a frozenset, so a literal
+    name containing glob characters, such as "[id].tsx", still matches itself.
+    Glob patterns (containing *, ? or [) are also translated with fnmatch and
+    combined into a single compiled regex.
 
     Args:
-        file_path (str): The path to the file.
+        patterns (List[str]): Names or glob patterns to match.
+
+    Returns:
+        Callable[[str], bool]: Function returning True for a matching name.
+    """
+    names = frozenset(patterns)
+    globs = [pattern for pattern in patterns if GLOB_CHARS.search(pattern)]
+    if not globs:
+        return names.__contains__
+
+    regex = re.compile("|".join(fnmatch.translate(pattern) for pattern in globs))
+    return lambda name: name in names or regex.match(name) is not None
+
+
+def _read_fd(fd: int, size: int) -> bytearray:
+    """
+    Read up to size bytes from a file descriptor into a preallocated buffer.
+
+    Args:
+        fd (int): The file descriptor to read from.
+        size (int): The expected size of the file.
+
+    Returns:
+        bytearray: The bytes read, truncated if the file ended early.
+    """
+    data = bytearray(size)
+    offset = 0
+    with memoryview(data) as view:
+        while offset < size:
+            if hasattr(os, "readv"):
+                n = os.readv(fd, [view[offset:]])
+            else:
+                chunk = os.read(fd, size - offset)
+                n = len(chunk)
+                view[offset:offset + n] = chunk
+            if not n:
+                break
+            offset += n
+    del data[offset:]
+    return data
+
+
+def _advise_sequential(fd: int):
+    """
+    Tell the kernel that a file will be read sequentially and in full, so it reads ahead.
+
+    This is only a hint; it is skipped where posix_fadvise is not available.
+
+    Args:
+        fd (int): File descriptor of the file.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+
+
+def _decode_text(data) -> Optional[str]:
+    """
+    Decode file bytes as UTF-8 text, rejecting binary content.
+
+    Args:
+        data: A bytes-like object with the file content.
 
     Returns:
-        bool: True if it's a text file, False otherwise.
+        Optional[str]: The decoded text, or None if the data is binary or not valid UTF-8.
     """
+    if data.find(b"\x00", 0, 1024) != -1:
+        # Null byte detected; likely a binary file (searched in place, without slicing a copy)
+        return None
+
     try:
-        with open(file_path, "rb") as f:
-            chunk = f.read(1024)
-            if b"\x00" in chunk:
-                # Null byte detected; likely a binary file
-                return False
-        return True
-    except Exception:
-        # Any exception means we cannot read the file
-        return False
+        content = str(data, "utf-8")
+    except UnicodeDecodeError:
+        # Skip files that cannot be decoded as UTF-8
+        return None
+
+    # Translate newlines the same way text mode does
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content
 
 
-def read_file_content(file_path: str) -> str:
+def read_file_content(file_path: str) -> Optional[str]:
     """
     Read the content of a text file using UTF-8 encoding.
 
+    The file is read once with os.open/os.read into a buffer sized from fstat,
+    bypassing the buffered and text I/O layers. For files larger than
+    READAHEAD_THRESHOLD the kernel is first asked to read them ahead. Files are not
+    memory-mapped: one that is truncated while mapped would kill the process with
+    SIGBUS, while a read just comes back short. The first 1024 bytes are
+    checked for null bytes to detect binary files before the content is decoded.
+
     Args:
         file_path (str): The path to the file.
 
     Returns:
-        str: The content of the file, or an empty string if unreadable.
+        Optional[str]: The content of the file, or None if it is binary or unreadable.
     """
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return f.read()
-    except UnicodeDecodeError:
-        # Skip files that cannot be decoded as UTF-8
-        return ""
-    except Exception as e:
-        # Handle other exceptions silently
-        return ""
+        fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    except OSError:
+        # Any exception means we cannot read the file
+        return None
+
+    try:
+        size = os.fstat(fd).st_size
+        if size > READAHEAD_THRESHOLD:
+            _advise_sequential(fd)
+        data = _read_fd(fd, size)
+    except (OSError, ValueError):
+        return None
+    finally:
+        os.close(fd)
+
+    return _decode_text(data)
+
+
+def _list_directory(directory: str) -> List[Tuple[os.DirEntry, bool]]:
+    """
+    List a directory and tell which of its entries are directories.
+
+    Args:
+        directory (str): The directory to list.
+
+    Returns:
+        List[Tuple[os.DirEntry, bool]]: The entries paired with whether they are directories,
+            or an empty list if the directory cannot be read.
+    """
+    entries = []
+    try:
+        with os.scandir(directory) as scandir_it:
+            for entry in scandir_it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                entries.append((entry, is_dir))
+    except OSError:
+        pass
+    return entries
+
+
+def iter_directory_files(
+        directory: str,
+        recursive: bool,
+        is_excluded_dir: Callable[[str], bool],
+        paths_abs: set,
+):
+    """
+    Walk a directory with os.scandir and yield the non-hidden files it contains.
+
+    Subdirectories are listed ahead on a thread pool as soon as they are found, so
+    the directory reads of a deep tree overlap while the walk itself stays on this
+    thread. Files are yielded in the same top-down order as os.walk. Symbolic links
+    to directories are not followed.
+
+    Args:
+        directory (str): The directory to walk.
+        recursive (bool): Whether to descend into subdirectories.
+        is_excluded_dir (Callable[[str], bool]): Tells whether a directory name is excluded.
+        paths_abs (set): Absolute paths of the input, used to allow hidden directories.
+
+    Yields:
+        os.DirEntry: Entries for the files found.
+    """
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        stack = [executor.submit(_list_directory, directory)]
+        while stack:
+            subdirs = []
+            for entry, is_dir in stack.pop().result():
+                name = entry.name
+                if is_dir:
+                    if not recursive or entry.is_symlink():
+                        continue
+                    # Exclude hidden directories unless explicitly included
+                    if name.startswith(".") and entry.path not in paths_abs:
+                        continue
+                    # Exclude specified directories
+                    if is_excluded_dir(name):
+                        continue
+                    subdirs.append(executor.submit(_list_directory, entry.path))
+                elif not name.startswith("."):
+                    # Exclude hidden files
+                    yield entry
+
+            # Push in reverse so subdirectories are visited in listing order
+            stack.extend(reversed(subdirs))
 
 
 def scan_files(
         input_paths: List[str],
         transform_paths: List[str],
-        exclude_dirs: List[str],
-        exclude_files: List[str],
+        is_excluded_dir: Callable[[str], bool],
+        is_excluded_file: Callable[[str], bool],
         recursive: bool,
         default_extension: str,
         transform_format: str,
         input_paths_abs: set,
         all_files: List[Dict[str, Any]],
         list_files: bool,
+        disk_order: bool,
 ):
     """
     Scan input paths and collect files to process.
@@ -246,79 +482,89 @@ def scan_files(
     Args:
         input_paths (List[str]): Input files or directories with optional extensions.
         transform_paths (List[str]): Transform files or directories with optional extensions and transform type.
-        exclude_dirs (List[str]): Directories to exclude.
-        exclude_files (List[str]): Files to exclude.
+        is_excluded_dir (Callable[[str], bool]): Tells whether a directory name is excluded.
+        is_excluded_file (Callable[[str], bool]): Tells whether a file name is excluded.
         recursive (bool): Whether to scan directories recursively.
         default_extension (str): Default file extension to use.
         transform_format (str): Default transform format to use.
         input_paths_abs (set): Absolute paths of the input.
         all_files (List[Dict[str, Any]]): List to store file information.
         list_files (bool): Whether to print found files.
+        disk_order (bool): Whether to record each file's device and inode for --disk-order.
     """
     # Keep track of transformed files to avoid duplication
     transformed_files = set()
 
+    # Collect "Found file" messages and print them in one write after the scan
+    listing: Optional[List[str]] = [] if list_files else None
+
     # First, process transform paths to populate transformed_files set
     process_paths(
         transform_paths,
-        exclude_dirs,
-        exclude_files,
+        is_excluded_dir,
+        is_excluded_file,
         recursive,
         default_extension,
         transform_format,  # Use the default transform format
         input_paths_abs,
         all_files,
-        list_files,
+        listing,
         transformed_files,
+        disk_order,
     )
 
     # Then process regular input paths, skipping files that are already transformed
     process_paths(
         input_paths,
-        exclude_dirs,
-        exclude_files,
+        is_excluded_dir,
+        is_excluded_file,
         recursive,
         default_extension,
         None,  # No transform for regular input paths
         input_paths_abs,
         all_files,
-        list_files,
+        listing,
         transformed_files,
+        disk_order,
     )
 
+    if listing:
+        click.echo("\n".join(listing))
+
 
 def process_paths(
         paths: List[str],
-        exclude_dirs: List[str],
-        exclude_files: List[str],
+        is_excluded_dir: Callable[[str], bool],
+        is_excluded_file: Callable[[str], bool],
         recursive: bool,
         default_extension: str,
         transform_format: Optional[str],
         paths_abs: set,
         all_files: List[Dict[str, Any]],
-        list_files: bool,
+        listing: Optional[List[str]],
         transformed_files: Optional[set] = None,
+        disk_order: bool = False,
 ):
     """
     Process a list of paths and collect files to process.
 
     Args:
         paths (List[str]): Files or directories with optional extensions and transform type.
-        exclude_dirs (List[str]): Directories to exclude.
-        exclude_files (List[str]): Files to exclude.
+        is_excluded_dir (Callable[[str], bool]): Tells whether a directory name is excluded.
+        is_excluded_file (Callable[[str], bool]): Tells whether a file name is excluded.
         recursive (bool): Whether to scan directories recursively.
         default_extension (str): Default file extension to use.
         transform_format (Optional[str]): Default transform format to use.
         paths_abs (set): Absolute paths of the input.
         all_files (List[Dict[str, Any]]): List to store file information.
-        list_files (bool): Whether to print found files.
+        listing (Optional[List[str]]): List to collect found file messages in, or None to not list files.
         transformed_files (Optional[set]): Set of normalized file paths that have been transformed
+        disk_order (bool): Whether to record each file's device and inode for --disk-order
     """
     if transformed_files is None:
         transformed_files = set()
 
-    paths_to_scan: List[Tuple[str, List[str], Optional[str]]] = []
-    index = 0  # Initialize index for file ordering
+    paths_to_scan: List[Tuple[str, Tuple[str, ...], Optional[str]]] = []
 
     for path_spec in paths:
         # Split path, extensions, and transform type if specified
@@ -327,7 +573,10 @@ def process_paths(
         extensions = []
         transform_type = transform_format  # Use the provided default transform format
 
-        if not os.path.exists(path):
+        # One stat tells whether the path exists and whether it is a file or a directory
+        try:
+            path_stat = os.stat(path)
+        except (OSError, ValueError):
             click.echo(f"Error: Path '{path}' does not exist.", err=True)
             continue
 
@@ -358,15 +607,14 @@ def process_paths(
         if path_is_hidden and path_abspath not in paths_abs:
             continue
 
-        if os.path.isfile(path):
+        path_mode = path_stat.st_mode
+        if stat.S_ISREG(path_mode):
             # Process individual file
-            if any(os.path.basename(path) == ef for ef in exclude_files):
-                continue
-            if not is_text_file(path):
+            if is_excluded_file(os.path.basename(path)):
                 continue
 
-            # Normalize file path for comparison
-            normalized_path = os.path.normpath(os.path.abspath(path))
+            # Normalize file path for comparison (abspath already normalizes it)
+            normalized_path = path_abspath
 
             # Skip if the file is in the transformed_files set and we're not transforming
             if normalized_path in transformed_files and transform_type is None:
@@ -376,137 +624,304 @@ def process_paths(
             if transform_type is not None:
                 transformed_files.add(normalized_path)
 
-            if list_files:
-                click.echo(f"Found file: {path}" +
-                           (f" (with transform: {transform_type})" if transform_type else ""))
-            all_files.append(
-                {
-                    "index": index,
-                    "file_path": path,
-                    "relative_path": os.path.basename(path),
-                    "transform": transform_type,
-                }
-            )
-            index += 1
-        elif os.path.isdir(path):
-            # Add directory to scan
-            paths_to_scan.append((path, extensions, transform_type))
+            if listing is not None:
+                listing.append(f"Found file: {path}" +
+                               (f" (with transform: {transform_type})" if transform_type else ""))
+            file_info = {
+                "file_path": path,
+                "relative_path": os.path.basename(path),
+                "transform": transform_type,
+            }
+            if disk_order:
+                file_info["inode"] = (path_stat.st_dev, path_stat.st_ino)
+            all_files.append(file_info)
+        elif stat.S_ISDIR(path_mode):
+            # Add directory to scan; a tuple lets str.endswith match all extensions in one call
+            paths_to_scan.append((path, tuple(extensions), transform_type))
         else:
             click.echo(f"Error: '{path}' is not a file or directory.", err=True)
             continue
 
     # Scan directories
     for directory, extensions, transform_type in paths_to_scan:
-        for root, dirs, files in os.walk(directory):
-            if not recursive:
-                dirs[:] = []  # Do not recurse into subdirectories
-
-            # Exclude hidden directories unless explicitly included
-            dirs[:] = [
-                d
-                for d in dirs
-                if not d.startswith(".") or os.path.join(root, d) in paths_abs
-            ]
-            # Exclude specified directories
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
-
-            # Exclude hidden files
-            files = [f for f in files if not f.startswith(".")]
-
-            for file in files:
-                if any(file == ef for ef in exclude_files):
+        # Canonicalize the directory once; file paths below it are built from it
+        directory_prefix = os.path.join(os.path.abspath(directory), "")
+        # Every walked path starts with the directory as given, so the relative path is a slice of it
+        relative_start = len(os.path.join(directory, ""))
+        # Per-directory values used for every file found below it
+        found_suffix = f" (with transform: {transform_type})" if transform_type else ""
+        add_file = all_files.append
+        for entry in iter_directory_files(directory, recursive, is_excluded_dir, paths_abs):
+            file = entry.name
+            if is_excluded_file(file):
+                continue
+            if file.lower().endswith(extensions):
+                file_path = entry.path
+                relative_path = file_path[relative_start:]
+
+                # Compare normalized absolute paths against transformed_files; when nothing
+                # has been transformed the path is neither built nor hashed
+                if transform_type is not None:
+                    # Add to transformed_files since we're transforming
+                    transformed_files.add(directory_prefix + relative_path)
+                elif transformed_files and directory_prefix + relative_path in transformed_files:
+                    # Skip files that are already included through a transform path
                     continue
-                if any(file.lower().endswith(ext) for ext in extensions):
-                    file_path = os.path.join(root, file)
-                    if not is_text_file(file_path):
-                        continue
 
-                    # Normalize file path for comparison
-                    normalized_path = os.path.normpath(os.path.abspath(file_path))
+                if listing is not None:
+                    listing.append(f"Found file: {file_path}{found_suffix}")
+                file_info = {
+                    "file_path": file_path,
+                    "relative_path": relative_path,
+                    "transform": transform_type,
+                }
+                if disk_order:
+                    # Stat the entry itself, so files below a mount point get their own device
+                    try:
+                        file_stat = entry.stat()
+                        file_info["inode"] = (file_stat.st_dev, file_stat.st_ino)
+                    except OSError:
+                        file_info["inode"] = (0, 0)
+                add_file(file_info)
 
-                    # Skip if the file is in the transformed_files set and we're not transforming
-                    if normalized_path in transformed_files and transform_type is None:
-                        continue
 
-                    # Add to transformed_files if we're transforming
-                    if transform_type is not None:
-                        transformed_files.add(normalized_path)
-
-                    relative_path = os.path.relpath(file_path, directory)
-                    if list_files:
-                        click.echo(f"Found file: {file_path}" +
-                                   (f" (with transform: {transform_type})" if transform_type else ""))
-                    all_files.append(
-                        {
-                            "index": index,
-                            "file_path": file_path,
-                            "relative_path": relative_path,
-                            "transform": transform_type,
-                        }
-                    )
-                    index += 1
-
-
-def consumer(
+def compile_template(template: str) -> Callable[[str, str], str]:
+    """
+    Build a function that fills in the {filename} and {filepath} placeholders of a template.
+
+    Templates that only use these two plain placeholders are parsed once and filled
+    by joining their pieces, so the template is not re-parsed for every file. Anything
+    else (format specs, conversions, other fields) goes through str.format as before.
+
+    Args:
+        template (str): Header or footer template.
+
+    Returns:
+        Callable[[str, str], str]: Function taking the filename and filepath.
+    """
+    try:
+        fields = list(string.Formatter().parse(template))
+    except ValueError:
+        fields = None
+
+    if fields is None or not all(
+            name is None or (name in ("filename", "filepath") and not spec and conversion is None)
+            for _, name, spec, conversion in fields):
+        return lambda filename, filepath: template.format(filename=filename, filepath=filepath)
+
+    pieces = [(literal, name) for literal, name, _, _ in fields]
+
+    def fill(filename: str, filepath: str) -> str:
+        values = {"filename": filename, "filepath": filepath, None: ""}
+        return "".join([literal + values[name] for literal, name in pieces])
+
+    return fill
+
+
+# Per-worker settings, populated by _init_worker in each pool worker
+_worker_header: Callable[[str, str], str] = compile_template("")
+_worker_footer: Callable[[str, str], str] = compile_template("")
+_worker_verbose = False
+
+
+def _init_worker(header_template: str, footer_template: str, verbose_value: bool = False):
+    """
+    Initialize a pool worker with the settings shared by all files.
+
+    Args:
+        header_template (str): Template for the header.
+        footer_template (str): Template for the footer.
+        verbose_value (bool): Whether to print verbose output.
+    """
+    global _worker_header, _worker_footer, _worker_verbose
+    # Compiled here rather than in main, as the resulting functions cannot be pickled
+    _worker_header = compile_template(header_template)
+    _worker_footer = compile_template(footer_template)
+    _worker_verbose = verbose_value
+
+
+def _process_one(file_info: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+    """
+    Read, optionally transform, and wrap a single file with header and footer.
+
+    Args:
+        file_info (Dict[str, Any]): File information collected by scan_files.
+
+    Returns:
+        Optional[Tuple[str, str, str]]: The header, content and footer of the file,
+                                        or None if it has no content.
+    """
+    file_path = file_info["file_path"]
+    relative_path = file_info["relative_path"]
+    transform = file_info.get("transform")
+
+    content = read_file_content(file_path)
+    if not content:
+        return None
+
+    # Apply transformation if specified
+    if transform:
+        try:
+            old_content = content
+            content = transform_content(content, transform)
+
+            # Detect if transformation had no effect
+            if content == old_content and _worker_verbose:
+                click.echo(f"Warning: Transformation to {transform} had no effect for {file_path}", err=True)
+        except Exception as e:
+            click.echo(f"Error transforming {file_path} to {transform}: {e}", err=True)
+            if _worker_verbose:
+                click.echo(traceback.format_exc(), err=True)
+
+    # Apply header and footer
+    header = _worker_header(relative_path, file_path)
+    footer = _worker_footer(relative_path, file_path)
+    return header, content, footer
+
+
+def process_files(
         all_files: List[Dict[str, Any]],
-        append_content_list: List[Dict[str, Any]],
         header_template: str,
         footer_template: str,
-        progress_bar,
         verbose_value: bool = False,
-):
+) -> Iterator[Optional[Tuple[str, str, str]]]:
     """
-    Process files from the shared list and append their content.
+    Process files concurrently and yield the results in the order of all_files.
+
+    Files with a transform go to a pool of worker processes, as transforms are
+    CPU-bound and would serialize on the GIL. Plain files are only read, which is
+    I/O-bound, so they go to a pool of threads that returns the content without
+    pickling it. Both pools run at the same time. When there are fewer than
+    MIN_FILES_FOR_PROCESSES transformed files, starting the worker processes would
+    cost more than it saves, so they are transformed in the thread pool as well.
 
     Args:
-        all_files (List[Dict[str, Any]]): Shared list of files to process.
-        append_content_list (List[Dict[str, Any]]): Shared list to store processed content.
+        all_files (List[Dict[str, Any]]): File information collected by scan_files.
         header_template (str): Template for the header.
         footer_template (str): Template for the footer.
-        progress_bar: Progress bar object.
         verbose_value (bool): Whether to print verbose output.
+
+    Yields:
+        Optional[Tuple[str, str, str]]: The header, content and footer of each file,
+                                        or None if it has no content.
     """
-    while True:
-        try:
-            # Retrieve file information
-            file_info = all_files.pop()
-        except IndexError:
-            # No more files to process
-            break
-        file_path = file_info["file_path"]
-        relative_path = file_info["relative_path"]
-        index = file_info["index"]
-        transform = file_info.get("transform")
-
-        content = read_file_content(file_path)
-
-        if content:
-            # Apply transformation if specified
-            if transform:
-                try:
-                    old_content = content
-                    content = transform_content(content, transform)
-
-                    # Detect if transformation had no effect
-                    if content == old_content and verbose_value:
-                        click.echo(f"Warning: Transformation to {transform} had no effect for {file_path}", err=True)
-                except Exception as e:
-                    click.echo(f"Error transforming {file_path} to {transform}: {e}", err=True)
-                    if verbose_value:
-                        import traceback
-                        click.echo(traceback.format_exc(), err=True)
-
-            # Apply header and footer
-            header = header_template.format(filename=relative_path, filepath=file_path)
-            footer = footer_template.format(filename=relative_path, filepath=file_path)
-            append_content_list.append(
-                {"index": index, "content": f"{header}{content}{footer}"}
+    transformed = [bool(file_info.get("transform")) for file_info in all_files]
+    if any(transformed):
+        # Load the transform module up front so forked workers inherit it and threads share it
+        load_extract_code_signatures()
+
+    in_process_pool = transformed if sum(transformed) >= MIN_FILES_FOR_PROCESSES else [False] * len(all_files)
+    process_pool_files = [file_info for file_info, in_process in zip(all_files, in_process_pool) if in_process]
+    thread_pool_files = [file_info for file_info, in_process in zip(all_files, in_process_pool) if not in_process]
+    initargs = (header_template, footer_template, verbose_value)
+
+    with contextlib.ExitStack() as stack:
+        process_results: Iterator[Optional[Tuple[str, str, str]]] = iter(())
+        thread_results: Iterator[Optional[Tuple[str, str, str]]] = iter(())
+
+        if process_pool_files:
+            num_workers = min(os.cpu_count() or 1, len(process_pool_files))
+            process_pool = stack.enter_context(
+                ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker, initargs=initargs)
+            )
+            chunksize = max(1, len(process_pool_files) // (4 * num_workers))
+            process_results = process_pool.map(_process_one, process_pool_files, chunksize=chunksize)
+
+        if thread_pool_files:
+            thread_pool = stack.enter_context(
+                ThreadPoolExecutor(
+                    max_workers=min(32, (os.cpu_count() or 1) * 4), initializer=_init_worker, initargs=initargs
+                )
             )
-        if progress_bar is not None:
-            # Update progress bar
-            transform_info = f" ({transform})" if transform else ""
-            progress_bar.set_postfix(file=f"{os.path.basename(file_path)}{transform_info}", refresh=False)
-            progress_bar.update(1)
+            thread_results = thread_pool.map(_process_one, thread_pool_files)
+
+        # Each pool yields in submission order, so merging by pool restores the scan order
+        for in_process in in_process_pool:
+            yield next(process_results if in_process else thread_results)
+
+
+def iter_content(prefix: str, results: Iterable[Optional[Tuple[str, str, str]]]) -> Iterator[str]:
+    """
+    Generate the prefix and the processed files piece by piece.
+
+    Files are separated by a newline. Header, content and footer are yielded as
+    separate pieces, so no concatenated copy of each file is built.
+
+    Args:
+        prefix (str): Text to yield before the first file.
+        results (Iterable[Optional[Tuple[str, str, str]]]): Header, content and footer of each
+                                                             processed file, or None if skipped.
+
+    Yields:
+        str: The pieces of the output, in order.
+    """
+    yield prefix
+    separator = ""
+    for result in results:
+        if result is None:
+            continue
+        yield separator
+        yield from result
+        separator = "\n"
+
+
+def write_content(write: Callable[[str], Any], prefix: str, results: Iterable[Optional[Tuple[str, str, str]]]):
+    """
+    Write the prefix and the processed files piece by piece.
+
+    Args:
+        write (Callable[[str], Any]): Function writing a piece of text, such as a stream's write method.
+        prefix (str): Text to write before the first file.
+        results (Iterable[Optional[Tuple[str, str, str]]]): Header, content and footer of each
+                                                             processed file, or None if skipped.
+    """
+    for piece in iter_content(prefix, results):
+        # Empty pieces (no prefix, the first separator, an empty file) would only cost a call
+        if piece:
+            write(piece)
+
+
+def write_output_file(output_file: str, prefix: str, results: Iterable[Optional[Tuple[str, str, str]]]) -> bool:
+    """
+    Write the prefix and the processed files to the output file.
+
+    Args:
+        output_file (str): Path of the file to write.
+        prefix (str): Text to write before the first file.
+        results (Iterable[Optional[Tuple[str, str, str]]]): Header, content and footer of each
+                                                             processed file, or None if skipped.
+
+    Returns:
+        bool: True if successful, False otherwise.
+    """
+    try:
+        output_file_ = open(output_file, "w", encoding="utf-8", buffering=1 << 20)
+    except OSError as e:
+        click.echo(f"Error writing to file {output_file}: {e}", err=True)
+        return False
+
+    # Only opening, writing and closing the file are guarded; an error raised while the
+    # results are being produced is not a write error and propagates to the caller
+    error: Optional[OSError] = None
+    try:
+        for piece in iter_content(prefix, results):
+            if not piece:
+                continue
+            try:
+                output_file_.write(piece)
+            except OSError as e:
+                error = e
+                break
+    finally:
+        try:
+            output_file_.close()
+        except OSError as e:
+            error = error or e
+
+    if error is not None:
+        click.echo(f"Error writing to file {output_file}: {error}", err=True)
+        return False
+    return True
 
 
 @click.command(context_settings={"max_content_width": 100})
@@ -551,7 +966,7 @@ def consumer(
     "exclude_dirs",
     multiple=True,
     default=[".git", "__pycache__", "venv", ".venv"],
-    help="Directories to exclude from processing",
+    help="Directories to exclude from processing, by name or glob pattern such as *.egg-info",
     show_default=True,
 )
 @click.option(
@@ -560,7 +975,7 @@ def consumer(
     "exclude_files",
     multiple=True,
     default=[],
-    help="Files to exclude from processing",
+    help="Files to exclude from processing, by name or glob pattern such as test_*.py",
     show_default=True,
 )
 @click.option(
@@ -600,6 +1015,12 @@ def consumer(
     help="Skip including system prompt with transform paths",
     show_default=True,
 )
+@click.option(
+    "--disk-order",
+    is_flag=True,
+    help="Read files in inode order to reduce seeking on spinning disks",
+    show_default=True,
+)
 @click.pass_context
 def main(
         ctx,
@@ -618,6 +1039,7 @@ def main(
         non_recursive,
         default_extension,
         skip_prompt,
+        disk_order,
 ):
     """
     Append files and directories with specified extensions or directly from files.
@@ -640,8 +1062,7 @@ def main(
     # Enable debug mode if requested
     if debug:
         verbose = True
-        import traceback
-        sys.excepthook = lambda type, value, tb: traceback.print_exception(type, value, tb)
+        sys.excepthook = traceback.print_exception
 
     # Load configuration profile if specified
     config = load_config_profile(profile)
@@ -675,6 +1096,10 @@ def main(
         # No exclude files specified, use config if available
         exclude_files_list = config.get("exclude_files", exclude_files_list)
 
+    # Build the exclusion checks once; plain names become set lookups and globs a single regex
+    is_excluded_dir = compile_name_patterns(exclude_dirs_list)
+    is_excluded_file = compile_name_patterns(exclude_files_list)
+
     # For other scalar options, use command-line if provided, otherwise use config value
     verbose_value = verbose or config.get("verbose", False)
     header_template_value = header_template
@@ -694,6 +1119,7 @@ def main(
     # unless explicitly disabled with --skip-prompt
     skip_prompt_value = skip_prompt or config.get("skip_prompt", False)
     include_system_prompt = transform_paths_list and not skip_prompt_value
+    disk_order_value = disk_order or config.get("disk_order", False)
 
     # Now continue with the rest of the function using the merged options
     if not input_paths_list and not transform_paths_list:
@@ -710,7 +1136,6 @@ def main(
         input_paths_abs.add(os.path.abspath(p.split(":", 1)[0]))
 
     all_files: List[Dict[str, Any]] = []  # List to store files to process
-    append_content_list: List[Dict[str, Any]] = []  # List to store processed content
 
     click.echo("Scanning files...")
 
@@ -718,14 +1143,15 @@ def main(
     scan_files(
         input_paths_list,
         transform_paths_list,
-        exclude_dirs_list,
-        exclude_files_list,
+        is_excluded_dir,
+        is_excluded_file,
         recursive,
         default_extension_value,
         transform_format_value,
         input_paths_abs,
         all_files,
         verbose_value,
+        disk_order_value,
     )
 
     total_files = len(all_files)
@@ -733,72 +1159,97 @@ def main(
         click.echo("No files to process.", err=True)
         return
 
-    # Initialize the progress bar
-    progress_bar = tqdm(
+    # Add system prompt if including transforms and not skipping prompt
+    system_prompt = get_system_prompt() if include_system_prompt else None
+    prefix = system_prompt + "\n\n" if system_prompt else ""
+
+    # Position in all_files of each file in the order it is processed
+    file_order = range(total_files)
+    files_to_process = all_files
+    if disk_order_value:
+        # Read in (device, inode) order, which mostly follows the on-disk layout; the output keeps the scan order
+        file_order = sorted(file_order, key=lambda index: all_files[index]["inode"])
+        files_to_process = [all_files[index] for index in file_order]
+
+    # When the output goes to a single file or the clipboard, write each result as it arrives
+    # instead of keeping them all; this needs the results in scan order
+    stream_output = bool(output_file_value) != bool(clipboard_value) and not disk_order_value
+
+    # Processed content by position in all_files; None for files without content
+    results: List[Optional[Tuple[str, str, str]]] = [None] * (0 if stream_output else total_files)
+    first_result = None
+    written = False
+    copied = False
+
+    # Let tqdm drive the iteration; it only checks the clock and repaints every
+    # few results instead of on each explicit update() call
+    with contextlib.closing(
+            process_files(files_to_process, header_template_value, footer_template_value, verbose_value)
+    ) as processed_files, tqdm(
+        processed_files,
         total=total_files,
         desc="Processing files",
         unit="file",
         ncols=80,
         bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} files [{elapsed}<{remaining}]",
-    )
+    ) as progress_bar:
+        if stream_output:
+            processed = (result for result in progress_bar if result is not None)
+            # Only open the output once there is something to write to it
+            first_result = next(processed, None)
+            if first_result is not None:
+                processed = itertools.chain([first_result], processed)
+                if output_file_value:
+                    written = write_output_file(output_file_value, prefix, processed)
+                else:
+                    copied = copy_to_clipboard(iter_content(prefix, processed))
+        else:
+            # The progress bar goes first so that it is the iterator zip exhausts and
+            # tqdm counts the last file
+            for result, index in zip(progress_bar, file_order):
+                results[index] = result
+
+    if stream_output:
+        if first_result is None:
+            click.echo("No files processed.", err=True)
+        elif output_file_value:
+            if written:
+                click.echo(f"Appended files have been written to {output_file_value}")
+        elif copied:
+            click.echo("Appended content has been copied to clipboard")
+        else:
+            click.echo("Failed to copy content to clipboard", err=True)
+        return
 
-    # Start consumer threads to process files concurrently
-    num_consumers = 4  # Number of threads to use
-    consumer_threads = []
-    for _ in range(num_consumers):
-        t = threading.Thread(
-            target=consumer,
-            args=(
-                all_files,
-                append_content_list,
-                header_template_value,
-                footer_template_value,
-                progress_bar,
-                verbose_value,
-            ),
-            daemon=True,
-        )
-        t.start()
-        consumer_threads.append(t)
-
-    # Wait for all threads to complete
-    for t in consumer_threads:
-        t.join()
-
-    progress_bar.close()
-
-    if not append_content_list:
+    if all(result is None for result in results):
         click.echo("No files processed.", err=True)
         return
 
-    # Sort the content to maintain the original order
-    append_content_list.sort(key=lambda x: x["index"])
-
-    # Add system prompt if including transforms and not skipping prompt
-    prefix = SYSTEM_PROMPT + "\n\n" if include_system_prompt else ""
-
-    # Concatenate the content from all files
-    append_content = prefix + "\n".join(item["content"] for item in append_content_list)
-
-    if output_file_value:
-        # Write the concatenated content to the specified output file
-        try:
-            with open(output_file_value, "w", encoding="utf-8") as output_file_:
-                output_file_.write(append_content)
-            click.echo(f"Appended files have been written to {output_file_value}")
-        except Exception as e:
-            click.echo(f"Error writing to file {output_file_value}: {e}", err=True)
-
     if clipboard_value:
-        # Copy the concatenated content to the clipboard
-        if copy_to_clipboard(append_content):
-            click.echo("Appended content has been copied to clipboard")
+        # Copy to the clipboard in the background while the output file is written
+        with ThreadPoolExecutor(max_workers=1) as clipboard_executor:
+            copied_future = clipboard_executor.submit(copy_to_clipboard, iter_content(prefix, results))
+            if output_file_value and write_output_file(output_file_value, prefix, results):
+                click.echo(f"Appended files have been written to {output_file_value}")
+            if copied_future.result():
+                click.echo("Appended content has been copied to clipboard")
+            else:
+                click.echo("Failed to copy content to clipboard", err=True)
+    elif output_file_value:
+        if write_output_file(output_file_value, prefix, results):
+            click.echo(f"Appended files have been written to {output_file_value}")
+    else:
+        # Output the content to the console piece by piece, without concatenating it first;
+        # writing to sys.stdout directly avoids the flush click.echo does on every call
+        if sys.stdout.isatty():
+            write = sys.stdout.write
         else:
-            click.echo("Failed to copy content to clipboard", err=True)
-
-    if not output_file_value and not clipboard_value:
-        # Output the concatenated content to the console
-        click.echo(append_content)
+            # Strip ANSI styles from output that is not a terminal, as click.echo does
+            def write(piece: str):
+                sys.stdout.write(click.unstyle(piece))
+        write_content(write, prefix, results)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
 
 
 if __name__ == "__main__":
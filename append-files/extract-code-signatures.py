@@ -7,12 +7,22 @@ Extract code structure from Python files and convert to different formats using
 
 import argparse
 import ast
+import contextlib
 import fnmatch
+import functools
+import hashlib
 import json
 import os
+import pickle
+import re
 import sys
+import tempfile
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Union
+
+# Below this many files, starting worker processes costs more than parsing in this process
+MIN_FILES_FOR_PROCESSES = 16
 
 # System prompt to be used with IDL output
 SYSTEM_PROMPT = """System Prompt:
@@ -39,14 +49,10 @@ Key Points:
 class ASTExtractor:
     """Base AST extractor to parse Python code and extract structure"""
 
-    def extract_code_structure(self, code: str) -> Dict[str, Any]:
-        """Extract the structure of Python code."""
+    def extract_code_structure(self, code: Union[str, bytes]) -> Dict[str, Any]:
+        """Extract the structure of Python code, given as text or as the raw bytes of a source file."""
         tree = ast.parse(code)
 
-        # Add depth information to track scope
-        for depth, node in self._walk_tree_with_depth(tree):
-            node._depth = depth
-
         extractor = CodeStructureExtractor()
         extractor.visit(tree)
 
@@ -56,12 +62,6 @@ class ASTExtractor:
 
         return extractor.structure
 
-    def _walk_tree_with_depth(self, node, depth=0):
-        """Walk the AST tree and yield each node with its depth."""
-        yield depth, node
-        for child in ast.iter_child_nodes(node):
-            yield from self._walk_tree_with_depth(child, depth + 1)
-
 
 class FormatAdapter(ABC):
     """Base adapter interface for different output formats"""
@@ -133,16 +133,17 @@ class IDLAdapter(FormatAdapter):
                     path = ""
                     tags = []
 
-                    # Determine HTTP method
-                    if "get(" in decorator_str.lower():
+                    # Determine HTTP method, lowercasing the decorator once for all checks
+                    decorator_lower = decorator_str.lower()
+                    if "get(" in decorator_lower:
                         http_method = "GET"
-                    elif "post(" in decorator_str.lower():
+                    elif "post(" in decorator_lower:
                         http_method = "POST"
-                    elif "put(" in decorator_str.lower():
+                    elif "put(" in decorator_lower:
                         http_method = "PUT"
-                    elif "delete(" in decorator_str.lower():
+                    elif "delete(" in decorator_lower:
                         http_method = "DELETE"
-                    elif "patch(" in decorator_str.lower():
+                    elif "patch(" in decorator_lower:
                         http_method = "PATCH"
 
                     # Extract path and tags - simple parsing from the decorator string
@@ -211,8 +212,16 @@ class IDLAdapter(FormatAdapter):
             if cls.get("class_vars"):
                 lines.append("")
 
+            # Split the constructor from the other methods in one pass
+            init_method = None
+            other_methods = []
+            for method in cls.get("methods", []):
+                if method["name"] != "__init__":
+                    other_methods.append(method)
+                elif init_method is None:
+                    init_method = method
+
             # Add constructor if present
-            init_method = next((m for m in cls.get("methods", []) if m["name"] == "__init__"), None)
             if init_method:
                 params_str = []
                 for param in init_method.get("params", [])[1:]:  # Skip self
@@ -225,12 +234,12 @@ class IDLAdapter(FormatAdapter):
                 lines.append(f"  constructor({', '.join(params_str)});")
 
                 if init_method.get("docstring"):
-                    lines[-1] = lines[-1] + "  // " + init_method["docstring"].split('\n')[0]
+                    lines[-1] = lines[-1] + "  // " + init_method["docstring"].partition('\n')[0]
 
                 lines.append("")
 
             # Add methods (excluding __init__)
-            for method in [m for m in cls.get("methods", []) if m["name"] != "__init__"]:
+            for method in other_methods:
                 # Add method docstring as comment
                 if method.get("docstring"):
                     for line in method["docstring"].split('\n'):
@@ -280,15 +289,25 @@ class JSONAdapter(FormatAdapter):
 
     def convert(self, structure: Dict[str, Any]) -> str:
         """Convert the extracted structure to JSON format"""
-        return json.dumps(structure, indent=2)
+        return json.dumps(structure, indent=2, default=repr)
 
     @staticmethod
     def convert_list(structures: List[Dict[str, Any]]) -> str:
         """Convert a list of structures to JSON format"""
-        return json.dumps(structures, indent=2)
+        return json.dumps(structures, indent=2, default=repr)
+
+    @staticmethod
+    def write_list(structures: List[Dict[str, Any]], f) -> None:
+        """Write a list of structures in JSON format to a file object as it is encoded"""
+        f.writelines(json.JSONEncoder(indent=2, default=repr).iterencode(structures))
+
 
+# Fields that hold nested statements (handlers and cases hold nodes that have a body),
+# in the order they appear in the node types that have them
+STATEMENT_FIELDS = ('body', 'handlers', 'orelse', 'finalbody', 'cases')
 
-class CodeStructureExtractor(ast.NodeVisitor):
+
+class CodeStructureExtractor:
     """Extract structural information from Python code"""
 
     def __init__(self):
@@ -300,6 +319,40 @@ class CodeStructureExtractor(ast.NodeVisitor):
         }
         self.current_class = None
 
+    def visit(self, node):
+        """
+        Walk the tree in pre-order with an explicit stack.
+
+        Handlers are looked up by node type in DISPATCH and return the items
+        still to be walked below the node, in order. Items are nodes or deferred
+        actions, such as closing a class body, which are called when popped.
+        """
+        dispatch = self.DISPATCH
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if not isinstance(item, ast.AST):
+                item()
+                continue
+            handler = dispatch.get(type(item))
+            pending = handler(self, item) if handler else self._child_statements(item)
+            # Push in reverse so items are visited in source order
+            stack.extend(reversed(pending))
+
+    @staticmethod
+    def _child_statements(node) -> List[ast.AST]:
+        """Return the statements nested directly in a node, in source order.
+
+        Statements only occur in these statement lists, never inside expressions, so
+        the fields are read directly instead of probing every child node.
+        """
+        children = []
+        for field in STATEMENT_FIELDS:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                children.extend(value)
+        return children
+
     def visit_Import(self, node):
         for name in node.names:
             self.structure["imports"].append({
@@ -307,7 +360,7 @@ class CodeStructureExtractor(ast.NodeVisitor):
                 "name": name.name,
                 "alias": name.asname
             })
-        self.generic_visit(node)
+        return ()
 
     def visit_ImportFrom(self, node):
         for name in node.names:
@@ -317,26 +370,24 @@ class CodeStructureExtractor(ast.NodeVisitor):
                 "name": name.name,
                 "alias": name.asname
             })
-        self.generic_visit(node)
-
-    def visit_Assign(self, node):
-        # Only capture assignments at module level, not inside functions or methods
-        if not self.current_class and isinstance(node, ast.Assign):
-            # Get the scope depth to ensure we're at module level
-            scope_depth = getattr(node, '_depth', 0)
-            if scope_depth == 0:  # Module level
-                for target in node.targets:
-                    if isinstance(target, ast.Name):
-                        # Attempt to get actual value
-                        value = self._extract_value(node.value)
+        return ()
 
-                        # Check if this variable name already exists to avoid duplication
-                        if not any(var["name"] == target.id for var in self.structure["global_vars"]):
-                            self.structure["global_vars"].append({
-                                "name": target.id,
-                                "value": value
-                            })
-        self.generic_visit(node)
+    def visit_Module(self, node):
+        # Only capture assignments at module level, not inside functions or methods;
+        # those are exactly the assignments in the module body
+        seen = set()
+        for child in node.body:
+            if isinstance(child, ast.Assign):
+                for target in child.targets:
+                    # Skip names that are already captured to avoid duplication
+                    if isinstance(target, ast.Name) and target.id not in seen:
+                        seen.add(target.id)
+                        self.structure["global_vars"].append({
+                            "name": target.id,
+                            # Attempt to get actual value
+                            "value": self._extract_value(child.value)
+                        })
+        return self._child_statements(node)
 
     def _extract_value(self, node):
         """Extract the actual value from an AST node if possible."""
@@ -345,7 +396,9 @@ class CodeStructureExtractor(ast.NodeVisitor):
         elif isinstance(node, ast.List):
             return [self._extract_value(item) for item in node.elts]
         elif isinstance(node, ast.Dict):
+            # Keys that JSON cannot represent, such as tuples, are kept as their repr
             keys = [self._extract_value(k) for k in node.keys]
+            keys = [k if k is None or isinstance(k, (str, int, float)) else repr(k) for k in keys]
             values = [self._extract_value(v) for v in node.values]
             return dict(zip(keys, values))
         elif isinstance(node, ast.Tuple):
@@ -403,15 +456,15 @@ class CodeStructureExtractor(ast.NodeVisitor):
         else:
             self.structure["functions"].append(function_data)
 
-        self.generic_visit(node)
+        return self._child_statements(node)
 
     def visit_FunctionDef(self, node):
         """Handle regular function definitions"""
-        self._process_function(node, is_async=False)
+        return self._process_function(node, is_async=False)
 
     def visit_AsyncFunctionDef(self, node):
         """Handle async function definitions"""
-        self._process_function(node, is_async=True)
+        return self._process_function(node, is_async=True)
 
     def visit_ClassDef(self, node):
         docstring = ast.get_docstring(node)
@@ -434,6 +487,11 @@ class CodeStructureExtractor(ast.NodeVisitor):
         old_class = self.current_class
         self.current_class = class_data
 
+        def close_class():
+            self.current_class = old_class
+            self.structure["classes"].append(class_data)
+
+        body = []
         for child in node.body:
             if isinstance(child, ast.Assign):
                 for target in child.targets:
@@ -446,10 +504,11 @@ class CodeStructureExtractor(ast.NodeVisitor):
                             "value": value
                         })
             else:
-                self.visit(child)
+                body.append(child)
 
-        self.current_class = old_class
-        self.structure["classes"].append(class_data)
+        # The class is closed once everything in its body has been walked
+        body.append(close_class)
+        return body
 
     def _get_annotation_str(self, node) -> str:
         """Extract a string representation of a type annotation from an AST node.
@@ -565,59 +624,202 @@ class CodeStructureExtractor(ast.NodeVisitor):
             return self._get_attribute_path(node)
         return "unknown_decorator"
 
+    DISPATCH = {
+        ast.Module: visit_Module,
+        ast.Import: visit_Import,
+        ast.ImportFrom: visit_ImportFrom,
+        ast.FunctionDef: visit_FunctionDef,
+        ast.AsyncFunctionDef: visit_AsyncFunctionDef,
+        ast.ClassDef: visit_ClassDef,
+    }
+
 
 class CodeProcessorFactory:
     """Factory for creating format-specific processors"""
 
+    # Adapters hold no state, so one instance of each is shared by all callers
+    ADAPTERS = {
+        "idl": IDLAdapter(),
+        "json": JSONAdapter(),
+    }
+
     @staticmethod
     def create_adapter(format_type: str) -> FormatAdapter:
-        """Create and return the appropriate adapter for the given format"""
-        if format_type == "idl":
-            return IDLAdapter()
-        elif format_type == "json":
-            return JSONAdapter()
-        else:
-            raise ValueError(f"Unsupported format type: {format_type}")
+        """Return the appropriate adapter for the given format"""
+        try:
+            return CodeProcessorFactory.ADAPTERS[format_type]
+        except KeyError:
+            raise ValueError(f"Unsupported format type: {format_type}") from None
+
+
+def default_cache_dir() -> Optional[str]:
+    """
+    Return the directory where extracted structures are cached between runs.
+
+    The directory name includes a hash of this script's source, so any change to
+    the extractor starts a fresh cache. Returns None, disabling the cache, if the
+    source cannot be read.
+    """
+    try:
+        with open(__file__, 'rb') as f:
+            source_digest = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+    except OSError:
+        return None
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    # The AST differs between Python versions, so each version gets its own cache
+    version_dir = f"{source_digest}-py{sys.version_info[0]}.{sys.version_info[1]}"
+    return os.path.join(cache_home, 'extract-code-signatures', version_dir)
+
+
+def _load_cached_structure(cache_path: str, digest: str) -> Optional[Dict[str, Any]]:
+    """Load a cached structure, or return None if there is no entry for this content."""
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_digest, structure = pickle.load(f)
+    except Exception:
+        # Missing or unreadable entries are cache misses
+        return None
+    # The entry belongs to the path; it is only valid if the content has not changed since
+    return structure if cached_digest == digest else None
+
+
+def _store_cached_structure(cache_path: str, digest: str, structure: Dict[str, Any]) -> None:
+    """Write a structure to the cache atomically; failing to cache is not an error."""
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((digest, structure), f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Concurrent runs may write the same entry; the rename makes the last one win whole
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except Exception:
+        pass
+
 
+def process_file(file_path: str, cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Process a single Python file.
 
-def process_file(file_path: str) -> Dict[str, Any]:
-    """Process a single Python file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        code = f.read()
+    When a cache directory is given, the structure is cached there in one entry per
+    file path, together with a hash of the content it was extracted from. An unchanged
+    file is not parsed again on later runs, and an edited file overwrites its entry,
+    so the cache holds at most one entry for each file ever processed.
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    structure = None
+    cache_path = None
+    if cache_dir:
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        path_digest = hashlib.blake2b(os.fsencode(os.path.abspath(file_path)), digest_size=16).hexdigest()
+        cache_path = os.path.join(cache_dir, f"{path_digest}.pkl")
+        structure = _load_cached_structure(cache_path, digest)
+
+    if structure is None:
+        # The parser decodes the bytes itself, honouring a BOM or coding declaration,
+        # and translates newlines as text mode would
+        extractor = ASTExtractor()
+        structure = extractor.extract_code_structure(data)
+        if cache_path:
+            _store_cached_structure(cache_path, digest, structure)
 
-    extractor = ASTExtractor()
-    structure = extractor.extract_code_structure(code)
     structure['file_path'] = file_path
 
     return structure
 
 
-def process_directory(directory: str, exclude_patterns: List[str]) -> List[Dict[str, Any]]:
-    """Process all Python files in a directory recursively."""
-    results = []
+def _process_file_or_error(
+        file_path: str,
+        cache_dir: Optional[str] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Process a single Python file, returning the error message instead of raising it."""
+    try:
+        return process_file(file_path, cache_dir), None
+    except Exception as e:
+        return None, str(e)
 
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if not file.endswith('.py'):
-                continue
 
-            file_path = os.path.join(root, file)
+def iter_python_files(directory: str) -> Iterator[str]:
+    """
+    Yield the paths of the Python files in a directory recursively.
 
-            # Check if file should be excluded
-            excluded = False
-            for pattern in exclude_patterns:
-                if fnmatch.fnmatch(file_path, pattern):
-                    excluded = True
-                    break
+    Uses os.scandir with an explicit stack, so entries are classified from the
+    directory listing without a stat per entry. Files come in the same top-down
+    order as os.walk, and symbolic links to directories are not followed.
+    """
+    stack = [directory]
+    while stack:
+        try:
+            scandir_it = os.scandir(stack.pop())
+        except OSError:
+            continue
+
+        subdirs = []
+        with scandir_it:
+            for entry in scandir_it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if is_dir:
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                elif entry.name.endswith('.py'):
+                    yield entry.path
+
+        # Push in reverse so subdirectories are visited in listing order
+        stack.extend(reversed(subdirs))
+
+
+def process_directory(
+        directory: str,
+        exclude_patterns: List[str],
+        cache_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Process all Python files in a directory recursively.
 
-            if excluded:
-                continue
+    Parsing is CPU-bound, so when there are enough files they are parsed on a
+    process pool. Results and errors keep the order of the directory walk.
+    """
+    file_paths = []
+
+    # Match all exclude patterns with one regex; like fnmatch.fnmatch, compare normcased paths
+    exclude_match = None
+    if exclude_patterns:
+        exclude_match = re.compile(
+            "|".join(f"(?:{fnmatch.translate(os.path.normcase(pattern))})" for pattern in exclude_patterns)
+        ).match
+
+    for file_path in iter_python_files(directory):
+        # Check if file should be excluded
+        if exclude_match and exclude_match(os.path.normcase(file_path)):
+            continue
+
+        file_paths.append(file_path)
+
+    process_one = functools.partial(_process_file_or_error, cache_dir=cache_dir)
+    num_workers = min(os.cpu_count() or 1, len(file_paths))
+    if num_workers > 1 and len(file_paths) >= MIN_FILES_FOR_PROCESSES:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            chunksize = max(1, len(file_paths) // (4 * num_workers))
+            outcomes = list(executor.map(process_one, file_paths, chunksize=chunksize))
+    else:
+        outcomes = map(process_one, file_paths)
 
-            try:
-                structure = process_file(file_path)
-                results.append(structure)
-            except Exception as e:
-                print(f"Error processing {file_path}: {str(e)}", file=sys.stderr)
+    results = []
+    for file_path, (structure, error) in zip(file_paths, outcomes):
+        if error is not None:
+            print(f"Error processing {file_path}: {error}", file=sys.stderr)
+        else:
+            results.append(structure)
 
     return results
 
@@ -654,40 +856,51 @@ def main():
                         help='Exclude patterns (can be specified multiple times)')
     parser.add_argument('--include-prompt', action='store_true',
                         help='Include system prompt with IDL output')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Parse every file instead of reusing structures cached by earlier runs')
 
     args = parser.parse_args()
 
+    cache_dir = None if args.no_cache else default_cache_dir()
+
     # Process input path
     if os.path.isfile(args.path):
-        structures = [process_file(args.path)]
+        structures = [process_file(args.path, cache_dir)]
     elif os.path.isdir(args.path):
-        structures = process_directory(args.path, args.exclude)
+        structures = process_directory(args.path, args.exclude, cache_dir)
     else:
         print(f"Error: {args.path} is not a valid file or directory", file=sys.stderr)
         sys.exit(1)
 
-    # Generate output using the adapter pattern
-    if args.format == 'json':
-        adapter = JSONAdapter()
-        # Use convert_list for a list of structures
-        output = adapter.convert_list(structures)
-    else:  # idl
-        output = SYSTEM_PROMPT if args.include_prompt else ""
-        adapter = IDLAdapter()
-        for structure in structures:
-            file_path = structure.pop('file_path')
-            if output:  # Add a newline if we already have content
-                output += "\n\n"
-            output += f"// File: {file_path}\n"
-            output += adapter.convert(structure)
-            output += f"\n// End of {file_path}\n"
-
-    # Write output
+    # Generate output using the adapter pattern, writing it as it is produced
+    # instead of building the whole output as one string first
     if args.output:
-        with open(args.output, 'w', encoding='utf-8') as f:
-            f.write(output)
+        output_context = open(args.output, 'w', encoding='utf-8')
     else:
-        print(output)
+        output_context = contextlib.nullcontext(sys.stdout)
+
+    with output_context as f:
+        if args.format == 'json':
+            # Use write_list for a list of structures
+            JSONAdapter.write_list(structures, f)
+        else:  # idl
+            wrote_content = False
+            if args.include_prompt:
+                f.write(SYSTEM_PROMPT)
+                wrote_content = True
+            adapter = IDLAdapter()
+            for structure in structures:
+                file_path = structure.pop('file_path')
+                if wrote_content:  # Add a newline if we already have content
+                    f.write("\n\n")
+                f.write(f"// File: {file_path}\n")
+                f.write(adapter.convert(structure))
+                f.write(f"\n// End of {file_path}\n")
+                wrote_content = True
+
+        if not args.output:
+            # End the output with a newline, as print() did
+            f.write("\n")
 
 
 if __name__ == "__main__":
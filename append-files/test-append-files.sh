@@ -0,0 +1,100 @@
+#!/bin/bash
+
+# test-append-files.sh
+# A script to test append-files.py against a small generated directory tree
+# Each test prints PASS or FAIL; the script exits non-zero if any test failed
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+APPEND_FILES="$SCRIPT_DIR/append-files.py"
+
+# Make sure append-files.py exists
+if [[ ! -f "$APPEND_FILES" ]]; then
+    echo "Error: append-files.py not found in $SCRIPT_DIR."
+    exit 1
+fi
+
+# Create test data directory, removed again when the script exits
+TEST_DIR="$(mktemp -d)"
+trap 'rm -rf "$TEST_DIR"' EXIT
+echo "Created test directory: $TEST_DIR"
+
+FAILURES=0
+
+pass() {
+    echo "PASS: $1"
+}
+
+fail() {
+    echo "FAIL: $1"
+    FAILURES=$((FAILURES + 1))
+}
+
+# Create input files
+mkdir -p "$TEST_DIR/input/sub"
+for i in 1 2 3; do
+    echo "print($i)" > "$TEST_DIR/input/file$i.py"
+done
+echo "print(4)" > "$TEST_DIR/input/sub/file4.py"
+
+echo ""
+echo "=== TEST 1: Progress bar counts every file (console output) ==="
+python3 "$APPEND_FILES" -i "$TEST_DIR/input" > /dev/null 2> "$TEST_DIR/progress.log"
+# tqdm redraws the bar with carriage returns, so look at its last state
+if tr '\r' '\n' < "$TEST_DIR/progress.log" | grep "Processing files" | tail -n 1 | grep -q "4/4 files"; then
+    pass "progress bar ends at 4/4"
+else
+    fail "progress bar does not end at 4/4"
+fi
+
+echo ""
+echo "=== TEST 2: Progress bar counts every file (--disk-order) ==="
+python3 "$APPEND_FILES" -i "$TEST_DIR/input" --disk-order -o "$TEST_DIR/disk-order.txt" > /dev/null 2> "$TEST_DIR/progress.log"
+if tr '\r' '\n' < "$TEST_DIR/progress.log" | grep "Processing files" | tail -n 1 | grep -q "4/4 files"; then
+    pass "progress bar ends at 4/4"
+else
+    fail "progress bar does not end at 4/4"
+fi
+
+echo ""
+echo "=== TEST 3: Exclude names containing brackets literally ==="
+mkdir -p "$TEST_DIR/brackets/[slug]"
+echo "print('id')" > "$TEST_DIR/brackets/[id].py"
+echo "print('slug')" > "$TEST_DIR/brackets/[slug]/page.py"
+echo "print('kept')" > "$TEST_DIR/brackets/kept.py"
+python3 "$APPEND_FILES" -i "$TEST_DIR/brackets" -x "[id].py" -e "[slug]" -o "$TEST_DIR/brackets.txt" > /dev/null 2>&1
+if grep -q "kept" "$TEST_DIR/brackets.txt" && ! grep -q "print('id')" "$TEST_DIR/brackets.txt"; then
+    pass "file [id].py excluded by its literal name"
+else
+    fail "file [id].py not excluded by its literal name"
+fi
+if grep -q "kept" "$TEST_DIR/brackets.txt" && ! grep -q "print('slug')" "$TEST_DIR/brackets.txt"; then
+    pass "directory [slug] excluded by its literal name"
+else
+    fail "directory [slug] not excluded by its literal name"
+fi
+
+echo ""
+echo "=== TEST 4: Exclude names matching glob patterns ==="
+mkdir -p "$TEST_DIR/globs/mypackage.egg-info"
+echo "print('egg')" > "$TEST_DIR/globs/mypackage.egg-info/meta.py"
+echo "print('test')" > "$TEST_DIR/globs/test_module.py"
+echo "print('kept')" > "$TEST_DIR/globs/module.py"
+python3 "$APPEND_FILES" -i "$TEST_DIR/globs" -e "*.egg-info" -x "test_*.py" -o "$TEST_DIR/globs.txt" > /dev/null 2>&1
+if grep -q "kept" "$TEST_DIR/globs.txt" && ! grep -q "print('egg')" "$TEST_DIR/globs.txt"; then
+    pass "directory mypackage.egg-info excluded by *.egg-info"
+else
+    fail "directory mypackage.egg-info not excluded by *.egg-info"
+fi
+if grep -q "kept" "$TEST_DIR/globs.txt" && ! grep -q "print('test')" "$TEST_DIR/globs.txt"; then
+    pass "file test_module.py excluded by test_*.py"
+else
+    fail "file test_module.py not excluded by test_*.py"
+fi
+
+echo ""
+if [[ $FAILURES -eq 0 ]]; then
+    echo "All tests passed!"
+else
+    echo "$FAILURES test(s) failed."
+    exit 1
+fi
@@ -0,0 +1,112 @@
+#!/bin/bash
+
+# test-extract-code-signatures.sh
+# A script to test the structure cache of extract-code-signatures.py
+# Each test prints PASS or FAIL; the script exits non-zero if any test failed
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+EXTRACT="$SCRIPT_DIR/extract-code-signatures.py"
+
+# Make sure extract-code-signatures.py exists
+if [[ ! -f "$EXTRACT" ]]; then
+    echo "Error: extract-code-signatures.py not found in $SCRIPT_DIR."
+    exit 1
+fi
+
+# Create test data directory, removed again when the script exits
+TEST_DIR="$(mktemp -d)"
+trap 'rm -rf "$TEST_DIR"' EXIT
+echo "Created test directory: $TEST_DIR"
+
+FAILURES=0
+
+pass() {
+    echo "PASS: $1"
+}
+
+fail() {
+    echo "FAIL: $1"
+    FAILURES=$((FAILURES + 1))
+}
+
+# Number of entries in a cache directory
+count_entries() {
+    find "$1" -name '*.pkl' 2>/dev/null | wc -l | tr -d ' '
+}
+
+# Create input file
+mkdir -p "$TEST_DIR/input"
+cat > "$TEST_DIR/input/module.py" << 'PYEOF'
+def first(value: int) -> int:
+    return value
+PYEOF
+
+CACHE_HOME="$TEST_DIR/cache"
+
+echo ""
+echo "=== TEST 1: First run fills the cache ==="
+XDG_CACHE_HOME="$CACHE_HOME" python3 "$EXTRACT" "$TEST_DIR/input" > "$TEST_DIR/run1.txt" 2>&1
+if [[ "$(count_entries "$CACHE_HOME")" -eq 1 ]]; then
+    pass "one cache entry written"
+else
+    fail "expected one cache entry, found $(count_entries "$CACHE_HOME")"
+fi
+
+echo ""
+echo "=== TEST 2: Second run reuses the cache entry ==="
+# A cache hit leaves the entry untouched, so nothing may be newer than this marker
+sleep 1
+touch "$TEST_DIR/marker"
+XDG_CACHE_HOME="$CACHE_HOME" python3 "$EXTRACT" "$TEST_DIR/input" > "$TEST_DIR/run2.txt" 2>&1
+if cmp -s "$TEST_DIR/run1.txt" "$TEST_DIR/run2.txt"; then
+    pass "output unchanged"
+else
+    fail "output changed between identical runs"
+fi
+if [[ -z "$(find "$CACHE_HOME" -name '*.pkl' -newer "$TEST_DIR/marker")" ]]; then
+    pass "cache entry reused"
+else
+    fail "cache entry rewritten although the file did not change"
+fi
+
+echo ""
+echo "=== TEST 3: Editing the file invalidates its entry ==="
+cat >> "$TEST_DIR/input/module.py" << 'PYEOF'
+
+
+def second(name: str) -> str:
+    return name
+PYEOF
+XDG_CACHE_HOME="$CACHE_HOME" python3 "$EXTRACT" "$TEST_DIR/input" > "$TEST_DIR/run3.txt" 2>&1
+if grep -q "second" "$TEST_DIR/run3.txt"; then
+    pass "output reflects the edit"
+else
+    fail "output does not reflect the edit"
+fi
+if [[ "$(count_entries "$CACHE_HOME")" -eq 1 ]]; then
+    pass "entry overwritten instead of added"
+else
+    fail "expected one cache entry, found $(count_entries "$CACHE_HOME")"
+fi
+
+echo ""
+echo "=== TEST 4: --no-cache neither reads nor writes the cache ==="
+XDG_CACHE_HOME="$TEST_DIR/no-cache" python3 "$EXTRACT" --no-cache "$TEST_DIR/input" > "$TEST_DIR/run4.txt" 2>&1
+if cmp -s "$TEST_DIR/run3.txt" "$TEST_DIR/run4.txt"; then
+    pass "output matches the cached run"
+else
+    fail "output differs from the cached run"
+fi
+if [[ ! -e "$TEST_DIR/no-cache" ]]; then
+    pass "no cache written"
+else
+    fail "cache written despite --no-cache"
+fi
+
+echo ""
+if [[ $FAILURES -eq 0 ]]; then
+    echo "All tests passed!"
+else
+    echo "$FAILURES test(s) failed."
+    exit 1
+fi
@@ -4,74 +4,117 @@ Secret Sanitizer - Identify and redact secrets in text content
 """
 import argparse
 import json
+import os
 import re
 import sys
-from typing import Dict, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
 
-# Secret patterns with their redaction markers
+# Below this many lines, starting worker processes costs more than scanning in this process
+MIN_LINES_FOR_PROCESSES = 20000
+
+# Secret patterns with their redaction markers and a piece of text that every match contains.
+# A pattern is only run on lines that contain its required text.
 SECRET_PATTERNS = [
     # Process quoted values first
     # 1. API Keys (quoted)
-    (r'([A-Za-z0-9_-]*(?:API[_-]KEY|APIKEY)[A-Za-z0-9_-]*)="([^"]*)"', r'\1="[API-KEY]"'),
-    (r'([A-Za-z0-9_-]*(?:API[_-]KEY|APIKEY)[A-Za-z0-9_-]*)=\'([^\']*)\'', r'\1=\'[API-KEY]\''),
+    (r'([A-Za-z0-9_-]*(?:API[_-]KEY|APIKEY)[A-Za-z0-9_-]*)="([^"]*)"', r'\1="[API-KEY]"', 'API'),
+    (r'([A-Za-z0-9_-]*(?:API[_-]KEY|APIKEY)[A-Za-z0-9_-]*)=\'([^\']*)\'', r'\1=\'[API-KEY]\'', 'API'),
 
     # 2. Passwords (quoted)
-    (r'([A-Za-z0-9_-]*[Pp][Aa][Ss][Ss][Ww][Oo][Rr][Dd][A-Za-z0-9_-]*)="([^"]*)"', r'\1="[PASSWORD]"'),
-    (r'([A-Za-z0-9_-]*[Pp][Aa][Ss][Ss][Ww][Oo][Rr][Dd][A-Za-z0-9_-]*)=\'([^\']*)\'', r'\1=\'[PASSWORD]\''),
+    (r'([A-Za-z0-9_-]*[Pp][Aa][Ss][Ss][Ww][Oo][Rr][Dd][A-Za-z0-9_-]*)="([^"]*)"', r'\1="[PASSWORD]"', '="'),
+    (r'([A-Za-z0-9_-]*[Pp][Aa][Ss][Ss][Ww][Oo][Rr][Dd][A-Za-z0-9_-]*)=\'([^\']*)\'', r'\1=\'[PASSWORD]\'', "='"),
 
     # 3. Generic secrets (quoted)
-    (r'([A-Za-z0-9_-]*(?:SECRET|KEY|TOKEN|AUTH|CRED|SIGN|IDENTITY|MSI)[A-Za-z0-9_-]*)="([^"]*)"', r'\1="[SECRET]"'),
+    (r'([A-Za-z0-9_-]*(?:SECRET|KEY|TOKEN|AUTH|CRED|SIGN|IDENTITY|MSI)[A-Za-z0-9_-]*)="([^"]*)"', r'\1="[SECRET]"',
+     '="'),
     (
         r'([A-Za-z0-9_-]*(?:SECRET|KEY|TOKEN|AUTH|CRED|SIGN|IDENTITY|MSI)[A-Za-z0-9_-]*)=\'([^\']*)\'',
-        r'\1=\'[SECRET]\''),
+        r'\1=\'[SECRET]\'', "='"),
 
     # 4. AWS specific
-    (r'AKIA[A-Z0-9]{16}', '[AWS-KEY]'),
-    (r'aws_secret_access_key\s*=\s*["\']?([A-Za-z0-9+/=]{20,})["\']?', r'aws_secret_access_key = "[AWS-SECRET]"'),
-    (r'"secret_key"\s*:\s*"([A-Za-z0-9+/=]{20,})"', r'"secret_key": "[AWS-SECRET]"'),
-    (r'aws_session_token\s*=\s*["\']([A-Za-z0-9+/=]{100,})["\']', r'aws_session_token = "[AWS-SESSION-TOKEN]"'),
+    (r'AKIA[A-Z0-9]{16}', '[AWS-KEY]', 'AKIA'),
+    (r'aws_secret_access_key\s*=\s*["\']?([A-Za-z0-9+/=]{20,})["\']?', r'aws_secret_access_key = "[AWS-SECRET]"',
+     'aws_secret_access_key'),
+    (r'"secret_key"\s*:\s*"([A-Za-z0-9+/=]{20,})"', r'"secret_key": "[AWS-SECRET]"', '"secret_key"'),
+    (r'aws_session_token\s*=\s*["\']([A-Za-z0-9+/=]{100,})["\']', r'aws_session_token = "[AWS-SESSION-TOKEN]"',
+     'aws_session_token'),
 
     # 5. Azure specific
-    (r'AccountKey=([A-Za-z0-9+/=]{50,})', r'AccountKey=[AZURE-KEY]'),
-    (r'sig=([A-Za-z0-9%+/=]{30,})', r'sig=[AZURE-SAS]'),
-    (r'AZURE_STORAGE_SAS_TOKEN="([^"]*)"', r'AZURE_STORAGE_SAS_TOKEN="[AZURE-SAS]"'),
-    (r'AZURE_OPENAI_API_KEY=([^\n\r]*)', r'AZURE_OPENAI_API_KEY=[API-KEY]'),
+    (r'AccountKey=([A-Za-z0-9+/=]{50,})', r'AccountKey=[AZURE-KEY]', 'AccountKey='),
+    (r'sig=([A-Za-z0-9%+/=]{30,})', r'sig=[AZURE-SAS]', 'sig='),
+    (r'AZURE_STORAGE_SAS_TOKEN="([^"]*)"', r'AZURE_STORAGE_SAS_TOKEN="[AZURE-SAS]"', 'AZURE_STORAGE_SAS_TOKEN="'),
+    (r'AZURE_OPENAI_API_KEY=([^\n\r]*)', r'AZURE_OPENAI_API_KEY=[API-KEY]', 'AZURE_OPENAI_API_KEY='),
 
     # 6. API Keys (unquoted) - requires careful ordering
-    (r'(AZURE_API_KEY(?:_\d+)?)=([^\n\r]*)', r'\1=[API-KEY]'),
-    (r'([A-Za-z0-9_-]*(?:API[_-]KEY|APIKEY)[A-Za-z0-9_-]*)=([^\n\r]*)', r'\1=[API-KEY]'),
+    (r'(AZURE_API_KEY(?:_\d+)?)=([^\n\r]*)', r'\1=[API-KEY]', 'AZURE_API_KEY'),
+    (r'([A-Za-z0-9_-]*(?:API[_-]KEY|APIKEY)[A-Za-z0-9_-]*)=([^\n\r]*)', r'\1=[API-KEY]', 'API'),
 
     # 7. JWT and other tokens
-    (r'eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}', '[JWT-TOKEN]'),
-    (r'AUTH_TOKEN\s*=\s*["\']?([A-Za-z0-9._-]{10,})["\']?', r'AUTH_TOKEN = "[AUTH-TOKEN]"'),
-    (r'AUTH-TOKEN\s*=\s*["\']?([A-Za-z0-9._-]{10,})["\']?', r'AUTH-TOKEN = "[AUTH-TOKEN]"'),
-    (r'Authorization token: ([A-Za-z0-9._-]{10,})', r'Authorization token: [AUTH-TOKEN]'),
-    (r'Bearer\s+([A-Za-z0-9._-]{10,})', r'Bearer [BEARER-TOKEN]'),
-    (r'Authorization: Bearer\s+([A-Za-z0-9._-]{10,})', r'Authorization: Bearer [BEARER-TOKEN]'),
+    (r'eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}', '[JWT-TOKEN]', 'eyJ'),
+    (r'AUTH_TOKEN\s*=\s*["\']?([A-Za-z0-9._-]{10,})["\']?', r'AUTH_TOKEN = "[AUTH-TOKEN]"', 'AUTH_TOKEN'),
+    (r'AUTH-TOKEN\s*=\s*["\']?([A-Za-z0-9._-]{10,})["\']?', r'AUTH-TOKEN = "[AUTH-TOKEN]"', 'AUTH-TOKEN'),
+    (r'Authorization token: ([A-Za-z0-9._-]{10,})', r'Authorization token: [AUTH-TOKEN]', 'Authorization token: '),
+    (r'Bearer\s+([A-Za-z0-9._-]{10,})', r'Bearer [BEARER-TOKEN]', 'Bearer'),
+    (r'Authorization: Bearer\s+([A-Za-z0-9._-]{10,})', r'Authorization: Bearer [BEARER-TOKEN]',
+     'Authorization: Bearer'),
 
     # 8. Passwords (unquoted)
-    (r'([A-Za-z0-9_-]*[Pp][Aa][Ss][Ss][Ww][Oo][Rr][Dd][A-Za-z0-9_-]*)=([^\n\r]*)', r'\1=[PASSWORD]'),
+    (r'([A-Za-z0-9_-]*[Pp][Aa][Ss][Ss][Ww][Oo][Rr][Dd][A-Za-z0-9_-]*)=([^\n\r]*)', r'\1=[PASSWORD]', '='),
 
     # 9. GitHub tokens
-    (r'ghp_[A-Za-z0-9]{36}', '[GITHUB-TOKEN]'),
-    (r'github_pat_[A-Za-z0-9_]{22}_[A-Za-z0-9]{59}', '[GITHUB-PAT]'),
+    (r'ghp_[A-Za-z0-9]{36}', '[GITHUB-TOKEN]', 'ghp_'),
+    (r'github_pat_[A-Za-z0-9_]{22}_[A-Za-z0-9]{59}', '[GITHUB-PAT]', 'github_pat_'),
 
     # 10. Google
-    (r'AIza[A-Za-z0-9_-]{35}', '[GOOGLE-API-KEY]'),
-    (r'[0-9]{12}-[A-Za-z0-9_]{32}\.apps\.googleusercontent\.com', '[GOOGLE-OAUTH]'),
+    (r'AIza[A-Za-z0-9_-]{35}', '[GOOGLE-API-KEY]', 'AIza'),
+    (r'[0-9]{12}-[A-Za-z0-9_]{32}\.apps\.googleusercontent\.com', '[GOOGLE-OAUTH]', '.apps.googleusercontent.com'),
 
     # 11. Authentication usernames/credentials
-    (r'AUTH_USERNAME=([^\n\r]*)', r'AUTH_USERNAME=[USERNAME]'),
+    (r'AUTH_USERNAME=([^\n\r]*)', r'AUTH_USERNAME=[USERNAME]', 'AUTH_USERNAME='),
 
     # 12. Generic secrets (unquoted) - should be last to avoid double-matching
     (r'([A-Za-z0-9_-]*(?:SECRET|KEY|TOKEN|AUTH|CRED|SIGN|IDENTITY|MSI)[A-Za-z0-9_-]*)=([^\n\r]*)',
-     r'\1=[SECRET]'),
+     r'\1=[SECRET]', '='),
+]
+
+
+def stats_key_for(replacement: str) -> str:
+    """Return the stats counter that a pattern's replacement text is counted under."""
+    if '[AWS-' in replacement:
+        return 'AWS'
+    elif '[AZURE-' in replacement:
+        return 'Azure'
+    elif '[API-KEY]' in replacement:
+        return 'API'
+    elif '[JWT-TOKEN]' in replacement:
+        return 'JWT'
+    elif '[PASSWORD]' in replacement:
+        return 'Password'
+    elif '[GITHUB-' in replacement:
+        return 'GitHub'
+    elif '[GOOGLE-' in replacement:
+        return 'Google'
+    elif '[USERNAME]' in replacement:
+        return 'Generic'  # Count usernames in Generic
+    else:
+        return 'Generic'
+
+
+# Compile the patterns and resolve their stats counters once instead of for every line
+COMPILED_SECRET_PATTERNS = [
+    (re.compile(pattern), replacement, required_text, stats_key_for(replacement))
+    for pattern, replacement, required_text in SECRET_PATTERNS
 ]
 
 
 # Handle multi-line patterns separately
 def redact_private_keys(content: str) -> Tuple[str, int]:
     """Redact private key contents from PEM files."""
+    # Without a BEGIN marker the loop below would only normalise the line endings
+    if "BEGIN PRIVATE KEY" not in content and "BEGIN RSA PRIVATE KEY" not in content:
+        return '\n'.join(content.splitlines()), 0
+
     count = 0
     in_key = False
     redacted_lines = []
@@ -94,10 +137,15 @@ def redact_private_keys(content: str) -> Tuple[str, int]:
     return '\n'.join(redacted_lines), count
 
 
+# Words in a JSON key that mark its value as a secret
+SECRET_KEY_WORDS = ('secret', 'key', 'token', 'password', 'auth', 'credential')
+
+
 def process_json_content(content: str) -> Tuple[str, int]:
     """Special processing for JSON content to handle structured data."""
     # Check if it looks like JSON
-    if not (content.strip().startswith('{') and content.strip().endswith('}')):
+    stripped = content.strip()
+    if not (stripped.startswith('{') and stripped.endswith('}')):
         return content, 0
 
     try:
@@ -105,39 +153,35 @@ def process_json_content(content: str) -> Tuple[str, int]:
         data = json.loads(content)
         count = 0
 
-        # Process the JSON recursively
-        def process_json_obj(obj):
-            nonlocal count
+        # Walk the nested objects with an explicit stack instead of recursing
+        stack = [data]
+        while stack:
+            obj = stack.pop()
             if isinstance(obj, dict):
                 for key, value in list(obj.items()):
                     # Check if key indicates a secret
-                    is_secret_key = any(word in key.lower() for word in
-                                        ['secret', 'key', 'token', 'password', 'auth', 'credential'])
+                    key_lower = key.lower()
+                    is_secret_key = any(word in key_lower for word in SECRET_KEY_WORDS)
 
                     if is_secret_key and isinstance(value, str) and len(value) >= 10:
                         # Redact the value
                         marker_type = 'API-KEY'
-                        if 'password' in key.lower():
+                        if 'password' in key_lower:
                             marker_type = 'PASSWORD'
-                        elif 'secret' in key.lower():
+                        elif 'secret' in key_lower:
                             marker_type = 'SECRET'
-                        elif 'token' in key.lower():
+                        elif 'token' in key_lower:
                             marker_type = 'TOKEN'
-                        elif 'auth' in key.lower():
+                        elif 'auth' in key_lower:
                             marker_type = 'AUTH'
 
                         obj[key] = f"[{marker_type}]"
                         count += 1
                     elif isinstance(value, (dict, list)):
                         # Process nested objects
-                        process_json_obj(value)
-            elif isinstance(obj, list):
-                for i, item in enumerate(obj):
-                    if isinstance(item, (dict, list)):
-                        process_json_obj(item)
-
-        # Process the entire JSON object
-        process_json_obj(data)
+                        stack.append(value)
+            else:
+                stack.extend(item for item in obj if isinstance(item, (dict, list)))
 
         # Convert back to string with pretty formatting
         return json.dumps(data, indent=2), count
@@ -146,10 +190,23 @@ def process_json_content(content: str) -> Tuple[str, int]:
         return content, 0
 
 
-def redact_secrets(content: str) -> Tuple[str, Dict[str, int]]:
-    """Redact secrets from text content while preserving line structure."""
-    # Initialize counters
-    stats = {
+# Report labels for each stats counter, in report order
+STAT_LABELS = (
+    ('AWS', 'AWS Credentials'),
+    ('Azure', 'Azure Credentials'),
+    ('API', 'API Keys/Tokens'),
+    ('JWT', 'JWT Tokens'),
+    ('Password', 'Passwords'),
+    ('Private', 'Private Keys'),
+    ('GitHub', 'GitHub Tokens'),
+    ('Google', 'Google Credentials'),
+    ('Generic', 'Generic Secrets'),
+)
+
+
+def new_stats() -> Dict[str, int]:
+    """Return zeroed counters for each type of secret."""
+    return {
         'AWS': 0,
         'Azure': 0,
         'API': 0,
@@ -161,6 +218,37 @@ def redact_secrets(content: str) -> Tuple[str, Dict[str, int]]:
         'Generic': 0
     }
 
+
+def redact_lines(lines: List[str]) -> Tuple[List[str], Dict[str, int]]:
+    """Apply the secret patterns to each line, counting the secrets found by type."""
+    stats = new_stats()
+    processed_lines = []
+
+    for line in lines:
+        current_line = line
+
+        # Apply patterns to each line
+        for pattern, replacement, required_text, stats_key in COMPILED_SECRET_PATTERNS:
+            # A plain substring search rules out most lines without running the regex
+            if required_text not in current_line:
+                continue
+
+            # Replace and count every match on the line in one pass
+            current_line, count = pattern.subn(replacement, current_line)
+
+            # Update stats
+            stats[stats_key] += count
+
+        processed_lines.append(current_line)
+
+    return processed_lines, stats
+
+
+def redact_secrets(content: str) -> Tuple[str, Dict[str, int]]:
+    """Redact secrets from text content while preserving line structure."""
+    # Initialize counters
+    stats = new_stats()
+
     # First, apply special processing for private keys
     content, private_key_count = redact_private_keys(content)
     stats['Private'] = private_key_count
@@ -173,45 +261,23 @@ def redact_secrets(content: str) -> Tuple[str, Dict[str, int]]:
 
     # Process line by line to maintain structure
     lines = content.splitlines(True)  # Keep line endings
-    processed_lines = []
-
-    for line in lines:
-        current_line = line
 
-        # Apply patterns to each line
-        for pattern, replacement in SECRET_PATTERNS:
-            matches = list(re.finditer(pattern, current_line))
-
-            # Process matches in reverse to avoid position shifts
-            for match in reversed(matches):
-                start, end = match.span()
-                match_text = match.group(0)
-
-                # Apply the pattern
-                new_text = re.sub(pattern, replacement, match_text)
-                current_line = current_line[:start] + new_text + current_line[end:]
-
-                # Update stats
-                if '[AWS-' in replacement:
-                    stats['AWS'] += 1
-                elif '[AZURE-' in replacement:
-                    stats['Azure'] += 1
-                elif '[API-KEY]' in replacement:
-                    stats['API'] += 1
-                elif '[JWT-TOKEN]' in replacement:
-                    stats['JWT'] += 1
-                elif '[PASSWORD]' in replacement:
-                    stats['Password'] += 1
-                elif '[GITHUB-' in replacement:
-                    stats['GitHub'] += 1
-                elif '[GOOGLE-' in replacement:
-                    stats['Google'] += 1
-                elif '[USERNAME]' in replacement:
-                    stats['Generic'] += 1  # Count usernames in Generic
-                else:
-                    stats['Generic'] += 1
+    # Lines are redacted independently, so large inputs are split into chunks of
+    # lines that are scanned on a process pool and put back together in order
+    num_workers = os.cpu_count() or 1
+    if num_workers > 1 and len(lines) >= MIN_LINES_FOR_PROCESSES:
+        chunk_size = -(-len(lines) // (4 * num_workers))
+        chunks = [lines[i:i + chunk_size] for i in range(0, len(lines), chunk_size)]
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            results = list(executor.map(redact_lines, chunks))
+    else:
+        results = [redact_lines(lines)]
 
-        processed_lines.append(current_line)
+    processed_lines = []
+    for chunk_lines, chunk_stats in results:
+        processed_lines.extend(chunk_lines)
+        for secret_type, count in chunk_stats.items():
+            stats[secret_type] += count
 
     return ''.join(processed_lines), stats
 
@@ -252,30 +318,17 @@ def main():
         sys.stdout.write(sanitized_content)
         print("\nSanitized content written to stdout")
 
-    # Report on secrets found
+    # Report on secrets found, written in one go rather than a print per line
     total_secrets = sum(stats.values())
-    print(f"Found {total_secrets} potential secrets")
+    report = [f"Found {total_secrets} potential secrets"]
 
     if args.verbose or total_secrets > 0:
-        print("Secret types detected:")
-        if stats['AWS'] > 0:
-            print(f"  - AWS Credentials: {stats['AWS']}")
-        if stats['Azure'] > 0:
-            print(f"  - Azure Credentials: {stats['Azure']}")
-        if stats['API'] > 0:
-            print(f"  - API Keys/Tokens: {stats['API']}")
-        if stats['JWT'] > 0:
-            print(f"  - JWT Tokens: {stats['JWT']}")
-        if stats['Password'] > 0:
-            print(f"  - Passwords: {stats['Password']}")
-        if stats['Private'] > 0:
-            print(f"  - Private Keys: {stats['Private']}")
-        if stats['GitHub'] > 0:
-            print(f"  - GitHub Tokens: {stats['GitHub']}")
-        if stats['Google'] > 0:
-            print(f"  - Google Credentials: {stats['Google']}")
-        if stats['Generic'] > 0:
-            print(f"  - Generic Secrets: {stats['Generic']}")
+        report.append("Secret types detected:")
+        for secret_type, label in STAT_LABELS:
+            if stats[secret_type] > 0:
+                report.append(f"  - {label}: {stats[secret_type]}")
+
+    sys.stdout.write('\n'.join(report) + '\n')
 
 
 if __name__ == '__main__':